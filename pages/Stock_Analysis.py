@@ -3,7 +3,13 @@ import pandas as pd
 import datetime
 import plotly.graph_objects as go
 import yfinance as yf
-from alpha_vantage.timeseries import TimeSeries
+import sys
+import os
+import tempfile
+
+# Fix import path for utils (for Streamlit Cloud / different layout)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pages.utils import history_store, export, market_data, data_quality
 
 # ------------------- PAGE CONFIG -------------------
 st.set_page_config(page_title="📈 Stock Analysis", page_icon="📊", layout="wide")
@@ -29,8 +35,10 @@ st.markdown("⏳ Fetching stock data...")
 # ------------------- FETCH DATA -------------------
 @st.cache_data(ttl=600)
 def fetch_yahoo_data(ticker: str, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
-    """Try fetching data from Yahoo Finance"""
+    """Try fetching data from Yahoo Finance (or the configured offline stand-in)"""
     try:
+        if not market_data.is_live():
+            return market_data.download(ticker, start_date, end_date)
         data = yf.download(ticker, start=start_date, end=end_date + datetime.timedelta(days=1), progress=False)
         # Ensure columns follow the expected names
         # yfinance returns: Open, High, Low, Close, Adj Close, Volume
@@ -42,10 +50,14 @@ def fetch_yahoo_data(ticker: str, start_date: datetime.date, end_date: datetime.
 @st.cache_data(ttl=600)
 def fetch_alpha_data(ticker: str, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
     """
-    Fallback: Fetch data from Alpha Vantage using compact outputsize (free tier).
-    This returns approx last 100 daily rows. We'll filter it to the requested date range.
+    Fallback: Alpha Vantage via the local history store.
+    Each compact pull (free tier, ~100 most recent rows) is accumulated on disk per ticker,
+    and ranges the store already covers are served without an API call.
     """
     try:
+        if not market_data.is_live():
+            return market_data.download(ticker, start_date, end_date)
+
         # Attempt to get the key from Streamlit secrets
         try:
             ALPHA_KEY = st.secrets["general"]["ALPHA_VANTAGE_KEY"]
@@ -53,35 +65,7 @@ def fetch_alpha_data(ticker: str, start_date: datetime.date, end_date: datetime.
             st.error("Alpha Vantage API key not found in st.secrets['general']['ALPHA_VANTAGE_KEY'].")
             return pd.DataFrame()
 
-        ts = TimeSeries(key=ALPHA_KEY, output_format="pandas")
-
-        # IMPORTANT: use 'compact' for free tier (last ~100 data points)
-        data, _ = ts.get_daily(symbol=ticker, outputsize="compact")
-
-        # Rename columns to match Yahoo style where possible
-        data = data.rename(
-            columns={
-                "1. open": "Open",
-                "2. high": "High",
-                "3. low": "Low",
-                "4. close": "Close",
-                "5. volume": "Volume",
-            }
-        )
-
-        # Convert index to datetime and sort
-        data.index = pd.to_datetime(data.index)
-        data.sort_index(inplace=True)
-
-        # Alpha Vantage does not provide 'Adj Close' — create a copy of 'Close' (so downstream code that expects Adj Close won't fail)
-        if "Adj Close" not in data.columns and "Close" in data.columns:
-            data["Adj Close"] = data["Close"]
-
-        # Filter to requested dates
-        filtered = data.loc[(data.index.date >= start_date) & (data.index.date <= end_date)]
-
-        # If filtered is empty but data exists (because requested range is older), return full data (so caller can decide)
-        return filtered if not filtered.empty else data
+        return history_store.get_alpha_history(ticker, ALPHA_KEY, start_date, end_date)
 
     except Exception as e:
         # Provide the error text from Alpha Vantage (e.g. premium feature warning) but keep it friendly
@@ -92,8 +76,9 @@ def fetch_alpha_data(ticker: str, start_date: datetime.date, end_date: datetime.
 data = fetch_yahoo_data(ticker, start_date, end_date)
 
 # If Yahoo fails or returns empty, try Alpha
-if data.empty:
-    st.warning("⚠️ Yahoo Finance returned no data. Trying Alpha Vantage (free tier: last ~100 days)...")
+used_alpha = data.empty
+if used_alpha:
+    st.warning("⚠️ Yahoo Finance returned no data. Trying Alpha Vantage (local history store + compact pulls)...")
     data = fetch_alpha_data(ticker, start_date, end_date)
 
 # Stop if no data from both
@@ -101,15 +86,11 @@ if data.empty:
     st.error("❌ Failed to fetch data from both Yahoo and Alpha Vantage. Please check the symbol or API key.")
     st.stop()
 
-# If Alpha returned only recent data and it doesn't cover the requested start_date, warn user
-try:
-    min_date = data.index.date.min()
-    if min_date > start_date:
-        st.warning(
-            f"Note: Data starts at {min_date}. Alpha Vantage (compact) returns only ~100 most recent daily rows on free tier."
-        )
-except Exception:
-    pass
+# Report honestly how much of the requested range the Alpha history store actually holds
+if used_alpha:
+    coverage_note = history_store.describe_coverage(ticker, start_date, end_date)
+    if coverage_note:
+        st.warning(f"Note: {coverage_note}")
 
 # ------------------- FILTER -------------------
 # Ensure the index is timezone-naive datetime date for comparisons
@@ -132,6 +113,16 @@ if data.empty:
     st.error("Data does not contain valid 'Close' prices after cleaning.")
     st.stop()
 
+# ------------------- DATA QUALITY -------------------
+# Findings are cached per distinct set of bars, so reruns never repeat the checks
+quality_flags = data_quality.cached_flags(data, ticker)
+quality_summary = data_quality.summarize(quality_flags)
+with st.expander(f"🩺 Data quality — {int(quality_summary.sum())} findings"):
+    st.dataframe(quality_summary.rename("Count"), use_container_width=True)
+    flagged = data_quality.flagged_rows(quality_flags)
+    if flagged.any():
+        st.dataframe(data.loc[flagged].join(quality_flags.loc[flagged]).round(3), use_container_width=True)
+
 # ------------------- INDICATORS -------------------
 data["MA20"] = data["Close"].rolling(window=20, min_periods=1).mean()
 data["MA50"] = data["Close"].rolling(window=50, min_periods=1).mean()
@@ -187,7 +178,58 @@ latest = data.tail(1).T
 latest.columns = ["Latest"]
 st.dataframe(latest.round(3), use_container_width=True)
 
-# ------------------- EXTRA: Download CSV -------------------
+# ------------------- EXTRA: Download data -------------------
+# Exports are built only when requested (not on every rerun)
 st.markdown("### 💾 Download data")
-csv = data.to_csv(index=True)
-st.download_button(label="Download CSV", data=csv, file_name=f"{ticker}_data_{start_date}_{end_date}.csv", mime="text/csv")
+export.lazy_download(
+    "data",
+    lambda fmt: export.frame_to_bytes(data, fmt),
+    file_stem=f"{ticker}_data_{start_date}_{end_date}",
+    key="ticker_export",
+)
+
+
+def iter_watchlist_history(symbols, start_date: datetime.date, end_date: datetime.date):
+    """Download one symbol at a time so only a single ticker's history is held in memory."""
+    for sym in symbols:
+        try:
+            if not market_data.is_live():
+                hist = market_data.download(sym, start_date, end_date)
+            else:
+                hist = yf.download(sym, start=start_date, end=end_date + datetime.timedelta(days=1), progress=False)
+        except Exception:
+            continue
+        if hist.empty:
+            continue
+        if isinstance(hist.columns, pd.MultiIndex):
+            hist.columns = hist.columns.get_level_values(0)
+        # Same dtypes for every ticker so Parquet chunks share one schema
+        hist = hist.astype("float64")
+        hist.index.name = "Date"
+        hist.insert(0, "Ticker", sym)
+        yield from export.iter_row_chunks(hist)
+
+
+def build_watchlist_export(symbols, fmt):
+    """
+    Write the watchlist through a temporary file, one ticker at a time, so raw histories are never
+    held together; only the finished (compressed) export is read back for the download button,
+    which keeps it in memory. Returns None when no symbol returned data.
+    """
+    with tempfile.TemporaryFile() as spool:
+        rows = export.write_chunks(iter_watchlist_history(symbols, start_date, end_date), spool, fmt)
+        if rows == 0:
+            return None
+        spool.seek(0)
+        return spool.read()
+
+
+with st.expander("📦 Bulk export a watchlist"):
+    watchlist_input = st.text_input("Watchlist (comma-separated symbols)", ticker)
+    watchlist = [sym.strip().upper() for sym in watchlist_input.split(",") if sym.strip()]
+    export.lazy_download(
+        "watchlist history",
+        lambda fmt: build_watchlist_export(watchlist, fmt),
+        file_stem=f"watchlist_{start_date}_{end_date}",
+        key="watchlist_export",
+    )
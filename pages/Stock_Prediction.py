@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import yfinance as yf
-from alpha_vantage.timeseries import TimeSeries
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error
@@ -13,6 +12,8 @@ import plotly.graph_objects as go
 
 # Fix import path for utils (for Streamlit Cloud / different layout)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pages.utils import history_store, global_model, export, market_data, data_quality
+
 # If you have the helper plotting functions, import them. If not, we'll fall back to simple plotting below.
 try:
     from pages.utils.plotly_figure import candlestick, RSI, Moving_average, MACD  # type: ignore
@@ -24,7 +25,7 @@ except Exception:
 st.set_page_config(page_title="🤖 Stock Price Prediction", layout="wide")
 st.title("🤖 Stock Price Prediction Dashboard")
 st.markdown(
-    "Predict short-term stock prices with simple ML models. Uses Yahoo Finance primarily and Alpha Vantage (compact) as a fallback."
+    "Predict short-term stock prices with simple ML models. Uses Yahoo Finance primarily and Alpha Vantage (accumulated local history) as a fallback."
 )
 
 # ------------------- USER INPUT -------------------
@@ -50,6 +51,8 @@ def fetch_yahoo(ticker: str, start_dt: date, end_dt: date) -> pd.DataFrame:
     Fetch from Yahoo using yfinance. Make end_date inclusive by adding one day to the end param.
     """
     try:
+        if not market_data.is_live():
+            return market_data.download(ticker, start_dt, end_dt)
         df = yf.download(ticker, start=start_dt, end=end_dt + timedelta(days=1), progress=False)
         if df.empty:
             return pd.DataFrame()
@@ -61,36 +64,21 @@ def fetch_yahoo(ticker: str, start_dt: date, end_dt: date) -> pd.DataFrame:
 @st.cache_data(ttl=600)
 def fetch_alpha(ticker: str, start_dt: date, end_dt: date) -> pd.DataFrame:
     """
-    Fallback using Alpha Vantage free tier (compact). compact returns approx last 100 daily rows.
-    We'll filter for requested range; if filtered is empty we still return compact data (recent history).
+    Fallback using Alpha Vantage through the local history store. Compact pulls (~100 recent rows)
+    are accumulated per ticker, so coverage grows over time and covered ranges need no API call.
+    If nothing falls inside the requested range we still return the stored history.
     """
     try:
+        if not market_data.is_live():
+            return market_data.download(ticker, start_dt, end_dt)
+
         try:
             ALPHA_KEY = st.secrets["general"]["ALPHA_VANTAGE_KEY"]
         except Exception:
             st.error("Alpha Vantage API key not found in st.secrets['general']['ALPHA_VANTAGE_KEY'].")
             return pd.DataFrame()
 
-        ts = TimeSeries(key=ALPHA_KEY, output_format="pandas")
-        data, _ = ts.get_daily(symbol=ticker, outputsize="compact")  # compact for free tier
-
-        data = data.rename(
-            columns={
-                "1. open": "Open",
-                "2. high": "High",
-                "3. low": "Low",
-                "4. close": "Close",
-                "5. volume": "Volume",
-            }
-        )
-        data.index = pd.to_datetime(data.index)
-        data.sort_index(inplace=True)
-
-        if "Adj Close" not in data.columns and "Close" in data.columns:
-            data["Adj Close"] = data["Close"]
-
-        filtered = data.loc[(data.index.date >= start_dt) & (data.index.date <= end_dt)]
-        return filtered if not filtered.empty else data
+        return history_store.get_alpha_history(ticker, ALPHA_KEY, start_dt, end_dt)
 
     except Exception as e:
         st.error(f"Alpha Vantage failed: {e}")
@@ -100,23 +88,20 @@ def fetch_alpha(ticker: str, start_dt: date, end_dt: date) -> pd.DataFrame:
 data = fetch_yahoo(ticker, start_date, end_date)
 
 # Fallback to Alpha if Yahoo returned nothing
-if data.empty:
-    st.warning("⚠️ Yahoo Finance returned no data. Trying Alpha Vantage (compact — last ~100 days)...")
+used_alpha = data.empty
+if used_alpha:
+    st.warning("⚠️ Yahoo Finance returned no data. Trying Alpha Vantage (local history store + compact pulls)...")
     data = fetch_alpha(ticker, start_date, end_date)
 
 if data.empty:
     st.error(f"❌ Could not fetch data for {ticker}. Check symbol or API key.")
     st.stop()
 
-# If Alpha provided only recent data and it doesn't cover requested start_date, warn user
-try:
-    min_date = data.index.date.min()
-    if min_date > start_date:
-        st.warning(
-            f"Note: available data starts on {min_date}. Alpha Vantage (compact) returns only ~100 most recent daily rows on free tier."
-        )
-except Exception:
-    pass
+# Report honestly how much of the requested range the Alpha history store actually holds
+if used_alpha:
+    coverage_note = history_store.describe_coverage(ticker, start_date, end_date)
+    if coverage_note:
+        st.warning(f"Note: {coverage_note}")
 
 # ------------------- CLEAN & PREP -------------------
 # Ensure numeric columns and drop rows with missing Close
@@ -138,6 +123,22 @@ if data.empty:
 # Expose data range
 st.success(f"✅ Data fetched for {ticker} — {data.index.date.min()} to {data.index.date.max()}")
 
+# ------------------- DATA QUALITY -------------------
+# Findings are cached per distinct set of bars, so reruns never repeat the checks
+quality_flags = data_quality.cached_flags(data, ticker)
+quality_summary = data_quality.summarize(quality_flags)
+with st.expander(f"🩺 Data quality — {int(quality_summary.sum())} findings"):
+    st.dataframe(quality_summary.rename("Count"), use_container_width=True)
+    flagged = data_quality.flagged_rows(quality_flags)
+    if flagged.any():
+        st.dataframe(data.loc[flagged].join(quality_flags.loc[flagged]).round(3), use_container_width=True)
+quality_action = st.selectbox(
+    "Flagged rows in training data",
+    ["Keep", "Exclude", "Repair"],
+    help="Exclude drops bad prints, OHLC inconsistencies and zero-volume days; Repair interpolates them. "
+    "Both back-adjust detected splits.",
+)
+
 # ------------------- TECHNICAL CHARTS -------------------
 st.subheader("📊 Technical Analysis Charts")
 if HAS_UTILS:
@@ -170,126 +171,252 @@ if not HAS_UTILS:
     fig_rsi.update_layout(title="RSI (14)")
     st.plotly_chart(fig_rsi, use_container_width=True)
 
-# ------------------- FEATURE ENGINEERING -------------------
-st.subheader("🔧 Feature Engineering")
-df = data.copy().sort_index()
-df = df.reset_index().rename(columns={df.columns[0]: "Date"})
-df["Date"] = pd.to_datetime(df["Date"]).dt.date  # keep date (not datetime) for clarity
-df["Close"] = pd.to_numeric(df["Close"], errors="coerce")
+# ------------------- MODEL SELECTION & TRAIN/TEST -------------------
+st.subheader("📈 Model Selection & Forecasting")
 
-# Create lag features and rolling stats
-N_LAGS = 5
-for lag in range(1, N_LAGS + 1):
-    df[f"lag_{lag}"] = df["Close"].shift(lag)
 
-df["roll_mean_7"] = df["Close"].rolling(window=7, min_periods=1).mean().shift(1)
-df["roll_std_7"] = df["Close"].rolling(window=7, min_periods=1).std().shift(1).fillna(0)
+def build_model(choice: str):
+    if choice == "Linear Regression":
+        return LinearRegression()
+    if choice == "Random Forest":
+        return RandomForestRegressor(n_estimators=150, random_state=42)
+    return GradientBoostingRegressor(n_estimators=150, random_state=42)
 
-# Drop rows with NaNs introduced by lags
-df = df.dropna(subset=[f"lag_{N_LAGS}"]).reset_index(drop=True)
-st.write(f"Features created: lags 1..{N_LAGS}, roll_mean_7, roll_std_7. Data rows available for modeling: {len(df)}")
 
-# ------------------- MODEL SELECTION & TRAIN/TEST -------------------
-st.subheader("📈 Model Selection & Forecasting")
+@st.cache_data(ttl=86400)
+def fetch_sector(ticker: str) -> str:
+    """Sector label used for the global model's sector encoding ('Unknown' if Yahoo has none)."""
+    if not market_data.is_live():
+        return "Unknown"
+    try:
+        return yf.Ticker(ticker).info.get("sector") or "Unknown"
+    except Exception:
+        return "Unknown"
 
-feature_cols = [f"lag_{i}" for i in range(1, N_LAGS + 1)] + ["roll_mean_7", "roll_std_7"]
 
-# Time-series train/test split: first 80% train, last 20% test
-split_pct = 0.8
-split_idx = int(len(df) * split_pct)
-train_df = df.iloc[:split_idx].copy()
-test_df = df.iloc[split_idx:].copy()
+@st.cache_data(ttl=600)
+def load_universe_closes(universe: tuple, start_dt: date, end_dt: date, quality_action: str) -> pd.DataFrame:
+    """
+    Wide Date x Ticker frame of closes for the universe (tickers with no data are skipped).
+    The data-quality stage runs once over the stacked bars of all tickers before pivoting.
+    """
+    frames = []
+    for sym in universe:
+        hist = fetch_yahoo(sym, start_dt, end_dt)
+        if not hist.empty and "Close" in hist.columns:
+            frames.append(hist.assign(Ticker=sym))
+    if not frames:
+        return pd.DataFrame()
 
-MIN_ROWS_TO_TRAIN = 30
-if train_df.shape[0] < MIN_ROWS_TO_TRAIN:
-    st.error(f"Not enough training rows (need >= {MIN_ROWS_TO_TRAIN}). Please extend start date or choose a longer range.")
-    st.stop()
+    bars = pd.concat(frames).rename_axis("Date")
+    for col in ["Open", "High", "Low", "Close", "Adj Close", "Volume"]:
+        if col in bars.columns:
+            bars[col] = pd.to_numeric(bars[col], errors="coerce")
+    bars = bars.dropna(subset=["Close"])
+    bars = data_quality.apply_flags(bars, data_quality.cached_flags(bars), quality_action)
+    return bars.reset_index().pivot(index="Date", columns="Ticker", values="Close").sort_index()
 
-X_train = train_df[feature_cols].values
-y_train = train_df["Close"].values
-X_test = test_df[feature_cols].values
-y_test = test_df["Close"].values
 
+@st.cache_resource(ttl=600)
+def train_global_model(universe: tuple, start_dt: date, end_dt: date, choice: str, quality_action: str):
+    """
+    Fit one estimator over the stacked universe. Cached per universe, date range, model and
+    quality action: reruns and switching to a ticker already in the universe reuse the fit,
+    while a ticker outside it is added to the universe and triggers a retrain.
+    Returns (model, test_frame, encoding, closes, feature_rows).
+    """
+    closes = load_universe_closes(universe, start_dt, end_dt, quality_action)
+    if closes.empty:
+        return None, pd.DataFrame(), None, closes, 0
+    sectors = {sym: fetch_sector(sym) for sym in closes.columns}
+    frame = global_model.build_feature_frame(closes)
+    model, test_frame, encoding = global_model.fit_global_model(build_model(choice), frame, sectors)
+    return model, test_frame, encoding, closes, len(frame)
+
+
+GLOBAL_MODE = "Global (multi-ticker)"
+DEFAULT_UNIVERSE = ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "JPM", "XOM", "JNJ"]
+
+training_mode = st.radio(
+    "Training mode",
+    ["Per-ticker", GLOBAL_MODE],
+    horizontal=True,
+    help="Global mode fits a single model on stacked return features from a whole universe of tickers.",
+)
 model_choice = st.selectbox("Choose model", ["Linear Regression", "Random Forest", "Gradient Boosting"])
-if model_choice == "Linear Regression":
-    model = LinearRegression()
-elif model_choice == "Random Forest":
-    model = RandomForestRegressor(n_estimators=150, random_state=42)
+
+if training_mode == GLOBAL_MODE:
+    universe_input = st.text_input("Universe (comma-separated symbols)", ", ".join(DEFAULT_UNIVERSE))
+    universe = tuple(sorted({sym.strip().upper() for sym in universe_input.split(",") if sym.strip()} | {ticker}))
+
+    with st.spinner(f"Training one global model on {len(universe)} tickers..."):
+        model, test_frame, encoding, closes, feature_rows = train_global_model(
+            universe, start_date, end_date, model_choice, quality_action.lower()
+        )
+
+    ticker_test = test_frame[test_frame["Ticker"] == ticker] if not test_frame.empty else test_frame
+    if ticker not in closes.columns or ticker_test.empty:
+        st.error("Not enough universe data to train the global model. Please extend the date range or check the symbols.")
+        st.stop()
+    st.write(f"Global model trained on {len(closes.columns)} tickers: {', '.join(closes.columns)}")
+
+    # ------------------- FEATURE ENGINEERING -------------------
+    st.subheader("🔧 Feature Engineering")
+    universe_names, sector_names, _ = encoding
+    st.write(
+        f"Features created per ticker on its own trading dates: {', '.join(global_model.RETURN_FEATURES)}, "
+        f"plus {len(universe_names)} ticker and {len(sector_names)} sector one-hot columns. "
+        f"Stacked rows available for modeling: {feature_rows}"
+    )
+
+    # Metrics on the selected ticker's next-day close (held-out last 20% of dates)
+    rmse = mean_squared_error(ticker_test["actual_close"], ticker_test["pred_close"], squared=False)
+    mae = mean_absolute_error(ticker_test["actual_close"], ticker_test["pred_close"])
+
+    col_rmse, col_mae = st.columns(2)
+    col_rmse.metric(f"Test RMSE ({ticker})", f"{rmse:.4f}")
+    col_mae.metric(f"Test MAE ({ticker})", f"{mae:.4f}")
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=ticker_test["next_date"], y=ticker_test["actual_close"], name="Test Actual", line=dict(color="black")))
+    fig.add_trace(go.Scatter(x=ticker_test["next_date"], y=ticker_test["pred_close"], name="Test Pred", line=dict(color="red", dash="dash")))
+    fig.update_layout(title=f"Global {model_choice} — {ticker} Actual vs Predicted (Test RMSE={rmse:.3f})", xaxis_title="Date", yaxis_title="Price")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ------------------- BATCHED UNIVERSE FORECAST -------------------
+    st.subheader(f"🔮 {future_horizon}-Day Recursive Forecast (whole universe, batched)")
+    universe_forecast = global_model.forecast_universe(model, closes, encoding, steps=future_horizon)
+    last_closes = closes.ffill().iloc[-1][universe_forecast.columns]
+    summary = pd.DataFrame(
+        {
+            "Last Close": last_closes,
+            f"Predicted (+{future_horizon}d)": universe_forecast.iloc[-1],
+            "Change %": (universe_forecast.iloc[-1] / last_closes - 1) * 100,
+        }
+    )
+    st.dataframe(summary.round(2), use_container_width=True)
+
+    forecast_df = universe_forecast[[ticker]].rename(columns={ticker: "Predicted"})
 else:
-    model = GradientBoostingRegressor(n_estimators=150, random_state=42)
-
-# Train
-with st.spinner("Training model..."):
-    model.fit(X_train, y_train)
-
-# Predict
-train_pred = model.predict(X_train)
-test_pred = model.predict(X_test)
-
-# Metrics
-rmse = mean_squared_error(y_test, test_pred, squared=False)
-mae = mean_absolute_error(y_test, test_pred)
-
-col_rmse, col_mae = st.columns(2)
-col_rmse.metric("Test RMSE", f"{rmse:.4f}")
-col_mae.metric("Test MAE", f"{mae:.4f}")
-
-# Plot actual vs predicted
-fig = go.Figure()
-fig.add_trace(go.Scatter(x=train_df["Date"], y=train_df["Close"], name="Train Actual", line=dict(color="blue")))
-fig.add_trace(go.Scatter(x=train_df["Date"], y=train_pred, name="Train Pred", line=dict(color="lightblue", dash="dot")))
-fig.add_trace(go.Scatter(x=test_df["Date"], y=test_df["Close"], name="Test Actual", line=dict(color="black")))
-fig.add_trace(go.Scatter(x=test_df["Date"], y=test_pred, name="Test Pred", line=dict(color="red", dash="dash")))
-fig.update_layout(title=f"{model_choice} — Actual vs Predicted (Test RMSE={rmse:.3f})", xaxis_title="Date", yaxis_title="Price")
-st.plotly_chart(fig, use_container_width=True)
-
-# ------------------- RECURSIVE FUTURE FORECAST -------------------
-st.subheader(f"🔮 {future_horizon}-Day Recursive Forecast")
-
-# We'll perform a recursive forecast using the latest available features.
-last_window = df.copy().reset_index(drop=True)
-# Get the last available row to seed recursion
-seed_row = last_window.iloc[-1:].copy()
-# Build initial feature vector from last row
-current_features = seed_row[feature_cols].iloc[0].values.reshape(1, -1)
-
-future_dates = []
-future_preds = []
-# To compute rolling stats we maintain a list of recent close values (last 7)
-recent_closes = list(last_window["Close"].values[-7:])  # may be <7 if small data
-
-for i in range(future_horizon):
-    pred = model.predict(current_features)[0]
-    future_preds.append(pred)
-    next_date = pd.to_datetime(seed_row["Date"].iloc[0]) + pd.Timedelta(days=i + 1)
-    future_dates.append(next_date.date())
-
-    # update recent_closes with predicted value
-    recent_closes.append(pred)
-    if len(recent_closes) > 7:
-        recent_closes = recent_closes[-7:]
-
-    # create next feature vector: shift lags, insert pred as lag_1
-    prev_lags = list(current_features[0][:N_LAGS])
-    # shift: new lag_1 is pred, lag_2 was previous lag_1, ...
-    new_lags = [pred] + prev_lags[:-1]
-    roll_mean_7 = np.mean(recent_closes)
-    roll_std_7 = np.std(recent_closes)
-    new_feat = new_lags + [roll_mean_7, roll_std_7]
-    current_features = np.array(new_feat).reshape(1, -1)
-
-forecast_df = pd.DataFrame({"Date": future_dates, "Predicted": future_preds})
-forecast_df = forecast_df.set_index("Date")
+    # ------------------- FEATURE ENGINEERING -------------------
+    st.subheader("🔧 Feature Engineering")
+    df = data_quality.apply_flags(data, quality_flags, quality_action.lower(), ticker).copy().sort_index()
+    df = df.rename_axis("Date").reset_index()
+    df["Date"] = pd.to_datetime(df["Date"]).dt.date  # keep date (not datetime) for clarity
+    df["Close"] = pd.to_numeric(df["Close"], errors="coerce")
+
+    # Create lag features and rolling stats
+    N_LAGS = 5
+    for lag in range(1, N_LAGS + 1):
+        df[f"lag_{lag}"] = df["Close"].shift(lag)
+
+    df["roll_mean_7"] = df["Close"].rolling(window=7, min_periods=1).mean().shift(1)
+    df["roll_std_7"] = df["Close"].rolling(window=7, min_periods=1).std().shift(1).fillna(0)
+
+    # Drop rows with NaNs introduced by lags
+    df = df.dropna(subset=[f"lag_{N_LAGS}"]).reset_index(drop=True)
+    st.write(f"Features created: lags 1..{N_LAGS}, roll_mean_7, roll_std_7. Data rows available for modeling: {len(df)}")
+
+    feature_cols = [f"lag_{i}" for i in range(1, N_LAGS + 1)] + ["roll_mean_7", "roll_std_7"]
+
+    # Time-series train/test split: first 80% train, last 20% test
+    split_pct = 0.8
+    split_idx = int(len(df) * split_pct)
+    train_df = df.iloc[:split_idx].copy()
+    test_df = df.iloc[split_idx:].copy()
+
+    MIN_ROWS_TO_TRAIN = 30
+    if train_df.shape[0] < MIN_ROWS_TO_TRAIN:
+        st.error(f"Not enough training rows (need >= {MIN_ROWS_TO_TRAIN}). Please extend start date or choose a longer range.")
+        st.stop()
+
+    X_train = train_df[feature_cols].values
+    y_train = train_df["Close"].values
+    X_test = test_df[feature_cols].values
+    y_test = test_df["Close"].values
+
+    model = build_model(model_choice)
+
+    # Train
+    with st.spinner("Training model..."):
+        model.fit(X_train, y_train)
+
+    # Predict
+    train_pred = model.predict(X_train)
+    test_pred = model.predict(X_test)
+
+    # Metrics
+    rmse = mean_squared_error(y_test, test_pred, squared=False)
+    mae = mean_absolute_error(y_test, test_pred)
+
+    col_rmse, col_mae = st.columns(2)
+    col_rmse.metric("Test RMSE", f"{rmse:.4f}")
+    col_mae.metric("Test MAE", f"{mae:.4f}")
+
+    # Plot actual vs predicted
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=train_df["Date"], y=train_df["Close"], name="Train Actual", line=dict(color="blue")))
+    fig.add_trace(go.Scatter(x=train_df["Date"], y=train_pred, name="Train Pred", line=dict(color="lightblue", dash="dot")))
+    fig.add_trace(go.Scatter(x=test_df["Date"], y=test_df["Close"], name="Test Actual", line=dict(color="black")))
+    fig.add_trace(go.Scatter(x=test_df["Date"], y=test_pred, name="Test Pred", line=dict(color="red", dash="dash")))
+    fig.update_layout(title=f"{model_choice} — Actual vs Predicted (Test RMSE={rmse:.3f})", xaxis_title="Date", yaxis_title="Price")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ------------------- RECURSIVE FUTURE FORECAST -------------------
+    st.subheader(f"🔮 {future_horizon}-Day Recursive Forecast")
+
+    # We'll perform a recursive forecast using the latest available features.
+    last_window = df.copy().reset_index(drop=True)
+    # Get the last available row to seed recursion
+    seed_row = last_window.iloc[-1:].copy()
+    # Build initial feature vector from last row
+    current_features = seed_row[feature_cols].iloc[0].values.reshape(1, -1)
+
+    future_dates = []
+    future_preds = []
+    # To compute rolling stats we maintain a list of recent close values (last 7)
+    recent_closes = list(last_window["Close"].values[-7:])  # may be <7 if small data
+
+    for i in range(future_horizon):
+        pred = model.predict(current_features)[0]
+        future_preds.append(pred)
+        next_date = pd.to_datetime(seed_row["Date"].iloc[0]) + pd.Timedelta(days=i + 1)
+        future_dates.append(next_date.date())
+
+        # update recent_closes with predicted value
+        recent_closes.append(pred)
+        if len(recent_closes) > 7:
+            recent_closes = recent_closes[-7:]
+
+        # create next feature vector: shift lags, insert pred as lag_1
+        prev_lags = list(current_features[0][:N_LAGS])
+        # shift: new lag_1 is pred, lag_2 was previous lag_1, ...
+        new_lags = [pred] + prev_lags[:-1]
+        roll_mean_7 = np.mean(recent_closes)
+        roll_std_7 = np.std(recent_closes)
+        new_feat = new_lags + [roll_mean_7, roll_std_7]
+        current_features = np.array(new_feat).reshape(1, -1)
+
+    forecast_df = pd.DataFrame({"Date": future_dates, "Predicted": future_preds})
+    forecast_df = forecast_df.set_index("Date")
 
 # Plot forecast
 st.line_chart(forecast_df)
 
 # ------------------- DOWNLOADS -------------------
+# Exports are built only when requested (not on every rerun)
 st.markdown("### 💾 Download data")
-hist_csv = data.reset_index().rename(columns={data.reset_index().columns[0]: "Date"}).to_csv(index=False)
-st.download_button(label="Download Historical CSV", data=hist_csv, file_name=f"{ticker}_historical_{start_date}_{end_date}.csv", mime="text/csv")
-
-forecast_csv = forecast_df.reset_index().to_csv(index=False)
-st.download_button(label="Download Forecast CSV", data=forecast_csv, file_name=f"{ticker}_forecast_{future_horizon}d.csv", mime="text/csv")
+export.lazy_download(
+    "historical data",
+    lambda fmt: export.frame_to_bytes(data.rename_axis("Date"), fmt),
+    file_stem=f"{ticker}_historical_{start_date}_{end_date}",
+    key="historical_export",
+)
+export.lazy_download(
+    "forecast",
+    lambda fmt: export.frame_to_bytes(forecast_df, fmt),
+    file_stem=f"{ticker}_forecast_{future_horizon}d",
+    key="forecast_export",
+)
 
 st.success("✅ Forecast complete! Use the model selector to compare models and the horizon slider to adjust prediction length.")
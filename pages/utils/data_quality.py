@@ -0,0 +1,308 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+)
+
+# -----------------------------------------------------------
+# ✅ Data-Quality Stage
+# -----------------------------------------------------------
+# Runs over OHLCV bars for one or many tickers at once (long format with a
+# 'Ticker' column, or a single ticker's frame). Every check is a vectorized
+# pass over the whole column set; per-ticker boundaries are handled by
+# sorting once by (ticker, date) and masking each ticker's first row.
+#
+# Flags (one row per bar):
+#   missing_sessions   exchange sessions missing between this bar and the previous one
+#   ohlc_inconsistent  High/Low don't bracket Open/Close, or a non-positive price
+#   zero_volume        Volume == 0
+#   split_ratio        detected split factor (price after = before / ratio), NaN if none;
+#                      only set when the new level persists and the move isn't a bad print
+#   return_outlier     |return - rolling median| > k * rolling MAD (splits excluded)
+#   bad_print          a move over BIG_MOVE that returns almost exactly to the prior close on the
+#                      next bar (checked before splits); plain MAD outliers never count
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close"]
+SPLIT_FACTORS = np.array([2, 3, 4, 5, 10, 20, 1 / 2, 1 / 3, 1 / 4, 1 / 5, 1 / 10, 1 / 20, 3 / 2, 2 / 3])
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+BIG_MOVE = np.log(1.4)  # overnight moves this large are checked as splits / bad prints regardless of MAD
+REVERT_BARS = 1  # a bad print must return to the prior close on the very next bar
+REVERT_TOL = 0.03  # ... to within this log distance (near-exact; a fading real move won't qualify)
+PERSIST_BARS = 3  # a split's new level must hold for this many bars
+PERSIST_TOL = 0.15  # ... to within this log distance of the split-adjusted prior close
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Approximation of the NYSE full-day holiday schedule."""
+
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=nearest_workday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def _sort_keys(bars, ticker=None):
+    """Integer ticker codes and the (ticker, date) sort order for a frame of bars."""
+    tickers = bars["Ticker"].to_numpy() if "Ticker" in bars.columns else np.full(len(bars), ticker or "", dtype=object)
+    codes, names = pd.factorize(tickers)
+    dates = pd.DatetimeIndex(bars.index).normalize()
+    order = np.lexsort((dates.asi8, codes))
+    return codes, names, dates, order
+
+
+def _missing_sessions(codes, names, dates):
+    """Sessions missing before each bar, using the NYSE calendar for US symbols and weekdays elsewhere."""
+    day = dates.values.astype("datetime64[D]")
+    first = np.r_[True, codes[1:] != codes[:-1]]
+    prev = np.where(first, day, np.r_[day[:1], day[:-1]])
+
+    holidays = NYSEHolidayCalendar().holidays(dates.min(), dates.max()).values.astype("datetime64[D]")
+    is_us = ~pd.Series(names, dtype=str).str.contains(".", regex=False).to_numpy()[codes]
+
+    us_gap = np.busday_count(prev, day, holidays=holidays) - 1
+    weekday_gap = np.busday_count(prev, day) - 1
+    return np.clip(np.where(is_us, us_gap, weekday_gap), 0, None)
+
+
+# -----------------------------------------------------------
+# ✅ Detection
+# -----------------------------------------------------------
+def flag_anomalies(bars, ticker=None, window=21, mad_k=5.0, split_tol=0.03):
+    """Return a frame of data-quality flags aligned to `bars` (see module comment)."""
+    if bars.empty:
+        return pd.DataFrame(index=bars.index)
+
+    codes, names, dates, order = _sort_keys(bars, ticker)
+    s = bars.iloc[order].reset_index(drop=True)
+    key = codes[order]
+    first = np.r_[True, key[1:] != key[:-1]]
+
+    close = s["Close"].astype(float)
+    prev_close = close.shift(1).mask(first)
+    ret = np.log(close / prev_close)
+
+    flags = pd.DataFrame(index=s.index)
+    flags["missing_sessions"] = _missing_sessions(key, names, dates[order])
+
+    o, h, l, c = (s[col].astype(float) for col in ["Open", "High", "Low", "Close"])
+    flags["ohlc_inconsistent"] = (
+        (h < np.maximum(o, c)) | (l > np.minimum(o, c)) | (h < l) | (s[["Open", "High", "Low", "Close"]] <= 0).any(axis=1)
+    ).to_numpy()
+    flags["zero_volume"] = (s["Volume"] == 0).to_numpy() if "Volume" in s.columns else False
+
+    move = ret.to_numpy()
+    log_close = np.log(close.to_numpy())
+    n = len(s)
+
+    def ahead(values, j, fill):
+        """values[t + j] for the same ticker, `fill` past the ticker's last bar."""
+        shifted = np.full(n, fill, dtype=np.asarray(values).dtype)
+        if j < n:
+            shifted[:-j] = values[j:]
+        same = np.zeros(n, dtype=bool)
+        if j < n:
+            same[:-j] = key[j:] == key[:-j]
+        return np.where(same, shifted, fill), same
+
+    # Rolling MAD outliers per ticker over every return (median/MAD are robust to a few jumps)
+    grouped = ret.groupby(key)
+    median = grouped.rolling(window, min_periods=10).median().reset_index(level=0, drop=True).sort_index()
+    deviation = (ret - median).abs()
+    mad = deviation.groupby(key).rolling(window, min_periods=10).median().reset_index(level=0, drop=True).sort_index()
+    z = (ret - median) / (MAD_SCALE * mad.replace(0, np.nan))
+    outlier = (z.abs() > mad_k).to_numpy()
+    big_move = np.abs(np.nan_to_num(move)) > BIG_MOVE
+    jump = outlier | big_move
+
+    # Bad prints first: a big move (not just a MAD outlier; real news moves often retrace partly)
+    # that returns to within REVERT_TOL of the previous close within REVERT_BARS bars.
+    # Bars t .. t+j-1 are the bad prints; bar t+j is the reversal.
+    prev_log_close = np.r_[np.nan, log_close[:-1]]
+    prev_log_close[first] = np.nan
+    bad_print = np.zeros(n, dtype=bool)
+    reversal = np.zeros(n, dtype=bool)
+    unresolved = big_move & ~first
+    for j in range(1, REVERT_BARS + 1):
+        later, same = ahead(log_close, j, np.nan)
+        back = same & (np.abs(later - prev_log_close) < REVERT_TOL)
+        starts = unresolved & back
+        for k in range(j):
+            bad_print[np.flatnonzero(starts) + k] = True
+        reversal[np.flatnonzero(starts) + j] = True
+        unresolved &= ~starts
+
+    # Split discontinuity: an overnight move within split_tol of -log(factor) for a common factor,
+    # accepted only if the previous bar was not itself a jump, the move is not a bad print or the
+    # reversal of one, and the new level persists over the next PERSIST_BARS bars.
+    distance = np.abs(move[:, None] + np.log(SPLIT_FACTORS)[None, :])
+    nearest = np.argmin(np.where(np.isnan(distance), np.inf, distance), axis=1)
+    factor = SPLIT_FACTORS[nearest]
+    candidate = (np.take_along_axis(distance, nearest[:, None], axis=1)[:, 0] < split_tol) & big_move
+    prev_jump = np.r_[False, jump[:-1]] & ~first
+
+    persists = np.zeros(n, dtype=bool)
+    for j in range(1, PERSIST_BARS + 1):
+        later, same = ahead(log_close, j, np.nan)
+        holds = np.abs(later - prev_log_close + np.log(factor)) < PERSIST_TOL
+        # Need at least the next bar; bars beyond the ticker's end are not required
+        persists = np.where(same, (persists | (j == 1)) & holds, persists)
+
+    is_split = candidate & persists & ~prev_jump & ~bad_print & ~reversal
+    flags["split_ratio"] = np.where(is_split, factor, np.nan)
+    flags["return_outlier"] = outlier & ~is_split
+    flags["bad_print"] = bad_print
+
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    return flags.iloc[inverse].set_axis(bars.index)
+
+
+def flagged_rows(flags):
+    """Boolean mask of bars with at least one finding."""
+    bool_cols = ["ohlc_inconsistent", "zero_volume", "return_outlier", "bad_print"]
+    return flags[bool_cols].any(axis=1) | (flags["missing_sessions"] > 0) | flags["split_ratio"].notna()
+
+
+def summarize(flags):
+    """Counts per check, for display."""
+    if flags.empty:
+        return pd.Series(dtype=int)
+    return pd.Series(
+        {
+            "Missing sessions": int(flags["missing_sessions"].sum()),
+            "OHLC inconsistencies": int(flags["ohlc_inconsistent"].sum()),
+            "Zero-volume days": int(flags["zero_volume"].sum()),
+            "Split discontinuities": int(flags["split_ratio"].notna().sum()),
+            "Return outliers (MAD)": int(flags["return_outlier"].sum()),
+            "Bad prints": int(flags["bad_print"].sum()),
+        }
+    )
+
+
+# -----------------------------------------------------------
+# ✅ Exclude / Repair
+# -----------------------------------------------------------
+def apply_flags(bars, flags, action="keep", ticker=None):
+    """
+    Act on the flags before training.
+      keep    - bars unchanged
+      exclude - back-adjust splits, drop bad prints / OHLC-inconsistent / zero-volume rows
+      repair  - back-adjust splits, re-interpolate those rows' prices (and volume) per ticker
+    Plain return outliers are left alone: a lone large move is usually a real one.
+    """
+    if action == "keep" or bars.empty or flags.empty:
+        return bars
+
+    bars = bars.copy()
+    price_cols = [col for col in PRICE_COLUMNS if col in bars.columns]
+    codes, _, _, order = _sort_keys(bars, ticker)
+
+    # Back-adjust: each bar is divided by the product of split ratios that come after it.
+    # Never on a bad print or the bar right after one (its reversal), whatever the flags say.
+    key = codes[order]
+    bad_sorted = flags["bad_print"].to_numpy(dtype=bool)[order]
+    after_bad = np.r_[False, bad_sorted[:-1] & (key[1:] == key[:-1])]
+    ratio = np.where(bad_sorted | after_bad, 1.0, flags["split_ratio"].fillna(1.0).to_numpy()[order])
+    after = (pd.Series(ratio[::-1]).groupby(key[::-1]).cumprod().to_numpy()[::-1]) / ratio
+    adjust = np.empty_like(after)
+    adjust[order] = after
+    bars[price_cols] = bars[price_cols].astype(float).div(adjust, axis=0)
+    if "Volume" in bars.columns:
+        bars["Volume"] = bars["Volume"].astype(float) * adjust
+
+    bad = (flags["bad_print"] | flags["ohlc_inconsistent"] | flags["zero_volume"]).to_numpy()
+    if action == "exclude":
+        return bars[~bad]
+
+    repair_cols = price_cols + (["Volume"] if "Volume" in bars.columns else [])
+    bars.loc[bad, repair_cols] = np.nan
+    bars[repair_cols] = bars[repair_cols].groupby(codes).transform(
+        lambda col: col.interpolate(limit_direction="both")
+    )
+    return bars
+
+
+# -----------------------------------------------------------
+# ✅ Cached Findings
+# -----------------------------------------------------------
+def bars_fingerprint(bars):
+    """Content hash of the bars (index + OHLCV + ticker) used as the findings cache key."""
+    cols = [col for col in ["Ticker", "Open", "High", "Low", "Close", "Adj Close", "Volume"] if col in bars.columns]
+    return hashlib.sha1(pd.util.hash_pandas_object(bars[cols], index=True).values.tobytes()).hexdigest()
+
+
+@st.cache_data(persist="disk", max_entries=256, show_spinner=False)
+def _flags_for(fingerprint, ticker, _bars):
+    return flag_anomalies(_bars, ticker)
+
+
+def cached_flags(bars, ticker=None):
+    """Flags for these bars, computed once per distinct set of bars and persisted with Streamlit's data cache."""
+    return _flags_for(bars_fingerprint(bars), ticker, bars)
+
+
+# -----------------------------------------------------------
+# ✅ Regression Checks
+# -----------------------------------------------------------
+if __name__ == "__main__":
+    # python -m pages.utils.data_quality
+    import datetime
+    from pages.utils.market_data import synthetic_ohlcv
+
+    true = synthetic_ohlcv("AAPL", datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))
+    spike_at = 150
+
+    # A one-day bad print at a split-like factor must not be read as a split
+    for factor in (2.0, 0.5, 1.5):
+        bars = true.copy()
+        bars.iloc[spike_at, bars.columns.get_indexer(PRICE_COLUMNS)] *= factor
+        flags = flag_anomalies(bars, "AAPL")
+        assert flags["split_ratio"].isna().all(), f"x{factor} spike read as a split"
+        assert flags["bad_print"].iloc[spike_at], f"x{factor} spike not flagged as a bad print"
+        for action in ("repair", "exclude"):
+            fixed = apply_flags(bars, flags, action, "AAPL")
+            before = true.index[:spike_at]
+            ratio = fixed.loc[before, "Close"] / true.loc[before, "Close"]
+            assert np.allclose(ratio, 1.0), f"x{factor} spike rescaled history on {action}"
+
+    # A genuine 2:1 split is detected and back-adjusted
+    bars = true.copy()
+    bars.iloc[spike_at:, bars.columns.get_indexer(PRICE_COLUMNS)] /= 2
+    flags = flag_anomalies(bars, "AAPL")
+    assert flags["split_ratio"].iloc[spike_at] == 2 and flags["split_ratio"].notna().sum() == 1
+    fixed = apply_flags(bars, flags, "repair", "AAPL")
+    assert np.allclose(fixed["Close"] * 2, true["Close"])
+
+    # A real +15% gap that fades to +2% over two days is a plain outlier, not a bad print,
+    # and Repair/Exclude must leave those prices alone
+    bars = true.copy()
+    cols = bars.columns.get_indexer(PRICE_COLUMNS)
+    bars.iloc[spike_at, cols] *= 1.15
+    bars.iloc[spike_at + 1, cols] *= 1.08
+    bars.iloc[spike_at + 2:, cols] *= 1.02
+    flags = flag_anomalies(bars, "AAPL")
+    assert not flags["bad_print"].any() and flags["split_ratio"].isna().all(), "fading gap flagged as a bad print"
+    for action in ("repair", "exclude"):
+        fixed = apply_flags(bars, flags, action, "AAPL")
+        faded = bars.index[spike_at:spike_at + 3]
+        assert np.allclose(fixed.loc[faded, "Close"], bars.loc[faded, "Close"]), f"fading gap altered on {action}"
+
+    print("data-quality regression checks passed")
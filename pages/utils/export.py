@@ -0,0 +1,92 @@
+import io
+import gzip
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+# -----------------------------------------------------------
+# ✅ Export Formats
+# -----------------------------------------------------------
+# Exports are only built when the user asks for them, and always go
+# through the chunked writer so a multi-ticker / intraday export never
+# needs the whole result as one in-memory CSV string.
+
+EXPORT_FORMATS = {
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet (zstd)": (".parquet", "application/vnd.apache.parquet"),
+    "CSV": (".csv", "text/csv"),
+}
+CHUNK_ROWS = 50_000
+
+
+def iter_row_chunks(df, chunk_rows=CHUNK_ROWS):
+    """Yield successive row slices of a frame (views, no copies)."""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+# -----------------------------------------------------------
+# ✅ Chunked Writer
+# -----------------------------------------------------------
+def write_chunks(chunks, fileobj, fmt, index=True):
+    """
+    Stream an iterable of DataFrames into a binary file object in the given format.
+    CSV writes the header once and appends each chunk; Parquet writes one row group per chunk,
+    using the first chunk's schema. Only one chunk is held in memory at a time.
+    Returns the number of rows written.
+    """
+    rows = 0
+    writer = None
+    sink = gzip.GzipFile(fileobj=fileobj, mode="wb") if fmt == "CSV (gzip)" else fileobj
+    text = io.TextIOWrapper(sink, encoding="utf-8", newline="") if fmt != "Parquet (zstd)" else None
+    try:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            if text is not None:
+                chunk.to_csv(text, index=index, header=rows == 0)
+            else:
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=index)
+                    writer = pq.ParquetWriter(fileobj, table.schema, compression="zstd")
+                else:
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=index)
+                writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+        if text is not None:
+            # Detach so closing the wrapper doesn't close the caller's file object
+            text.flush()
+            text.detach()
+        if sink is not fileobj:
+            sink.close()
+    return rows
+
+
+def frame_to_bytes(df, fmt, index=True):
+    """Serialise one frame in the chosen format via the chunked writer."""
+    buffer = io.BytesIO()
+    write_chunks(iter_row_chunks(df), buffer, fmt, index=index)
+    return buffer.getvalue()
+
+
+# -----------------------------------------------------------
+# ✅ Lazy Streamlit Download
+# -----------------------------------------------------------
+def lazy_download(label, build, file_stem, key):
+    """
+    Render a format picker and a 'Prepare' button; the export is only built
+    (build(fmt) -> bytes, or None when there is nothing to export) after the button is clicked.
+    """
+    col_fmt, col_btn = st.columns([2, 1])
+    fmt = col_fmt.selectbox(f"{label} format", list(EXPORT_FORMATS), key=f"{key}_fmt")
+    if col_btn.button(f"Prepare {label}", key=f"{key}_prepare"):
+        ext, mime = EXPORT_FORMATS[fmt]
+        with st.spinner(f"Preparing {label}..."):
+            payload = build(fmt)
+        if payload is None:
+            st.warning(f"No data available for {label}; nothing to export.")
+            return
+        st.download_button(label=f"Download {label}", data=payload, file_name=f"{file_stem}{ext}", mime=mime, key=f"{key}_download")
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# ✅ Global (Multi-Ticker) Model
+# -----------------------------------------------------------
+# Instead of one tiny model per ticker, every ticker in a universe is
+# turned into the same scale-free features (log returns, not prices),
+# stacked into one training matrix with ticker/sector one-hot columns,
+# and a single estimator is fitted once. Forecasts for the whole
+# universe then come from one batched predict per horizon step.
+
+N_LAGS = 5
+ROLL_WINDOW = 7
+MIN_TRAIN_DATES = 30
+RETURN_FEATURES = [f"ret_lag_{i}" for i in range(1, N_LAGS + 1)] + ["ret_mean_7", "ret_std_7", "close_vs_mean_7"]
+
+
+def _encodings(tickers, sectors):
+    """One-hot ticker and sector columns with a fixed category order."""
+    universe = sorted(set(tickers))
+    sector_names = sorted({sectors.get(t, "Unknown") for t in universe})
+    return universe, sector_names
+
+
+def _encode(frame, universe, sector_names, sectors):
+    ticker_cat = pd.Categorical(frame["Ticker"], categories=universe)
+    sector_cat = pd.Categorical(frame["Ticker"].map(lambda t: sectors.get(t, "Unknown")), categories=sector_names)
+    ticker_oh = pd.get_dummies(ticker_cat, prefix="tkr").astype(float)
+    sector_oh = pd.get_dummies(sector_cat, prefix="sec").astype(float)
+    ticker_oh.index = sector_oh.index = frame.index
+    return pd.concat([frame[RETURN_FEATURES], ticker_oh, sector_oh], axis=1)
+
+
+def build_feature_frame(closes):
+    """
+    Build the stacked feature frame from a wide Date x Ticker frame of closes.
+    The wide frame is stacked to long form first and every lag/rolling feature is computed
+    per ticker on that ticker's own trading dates, so another exchange's holiday in the
+    union index doesn't blank a ticker's features.
+    Each row holds features known at the close of Date and the next session's log return as target.
+    """
+    long = closes.sort_index().rename_axis("Date").rename_axis("Ticker", axis=1).stack().rename("Close")
+    long = long.reset_index().sort_values(["Ticker", "Date"], kind="stable").reset_index(drop=True)
+
+    by_ticker = long.groupby("Ticker", sort=False)
+    returns = np.log(long["Close"] / by_ticker["Close"].shift(1))
+    ret_by_ticker = returns.groupby(long["Ticker"], sort=False)
+
+    long["target"] = ret_by_ticker.shift(-1)
+    long["next_date"] = by_ticker["Date"].shift(-1)
+    for lag in range(1, N_LAGS + 1):
+        long[f"ret_lag_{lag}"] = ret_by_ticker.shift(lag - 1)
+    long["ret_mean_7"] = ret_by_ticker.transform(lambda r: r.rolling(ROLL_WINDOW, min_periods=ROLL_WINDOW).mean())
+    long["ret_std_7"] = ret_by_ticker.transform(lambda r: r.rolling(ROLL_WINDOW, min_periods=ROLL_WINDOW).std())
+    roll_mean = by_ticker["Close"].transform(lambda c: c.rolling(ROLL_WINDOW, min_periods=ROLL_WINDOW).mean())
+    long["close_vs_mean_7"] = long["Close"] / roll_mean - 1
+
+    return long.dropna(subset=RETURN_FEATURES + ["Close"]).reset_index(drop=True)
+
+
+def fit_global_model(estimator, frame, sectors=None, split_pct=0.8):
+    """
+    Fit one estimator on the stacked universe. The train/test split is by date
+    (first split_pct of dates train) so no ticker leaks future data into training.
+    Returns (model, test_frame with 'pred_return'/'pred_close', encoding); the model is None
+    and the test frame empty when there are fewer than MIN_TRAIN_DATES dates to train on.
+    """
+    sectors = sectors or {}
+    universe, sector_names = _encodings(frame["Ticker"], sectors)
+    encoding = (universe, sector_names, sectors)
+    labelled = frame.dropna(subset=["target"])
+
+    dates = np.sort(labelled["Date"].unique())
+    split_idx = int(len(dates) * split_pct)
+    if split_idx < MIN_TRAIN_DATES or split_idx >= len(dates):
+        return None, labelled.iloc[0:0], encoding
+    split_date = dates[split_idx]
+    train = labelled[labelled["Date"] < split_date]
+    test = labelled[labelled["Date"] >= split_date].copy()
+
+    X_train = _encode(train, universe, sector_names, sectors).values
+    estimator.fit(X_train, train["target"].values)
+
+    test["pred_return"] = estimator.predict(_encode(test, universe, sector_names, sectors).values)
+    test["actual_close"] = test["Close"] * np.exp(test["target"])
+    test["pred_close"] = test["Close"] * np.exp(test["pred_return"])
+    return estimator, test, encoding
+
+
+def forecast_universe(model, closes, encoding, steps=30):
+    """
+    Recursive forecast for every ticker at once: each step is a single batched
+    predict over one row per ticker. Returns a Date x Ticker frame of prices.
+    """
+    universe, sector_names, sectors = encoding
+
+    # Each ticker's own last ROLL_WINDOW + 1 closes, ignoring dates it didn't trade
+    long = closes.sort_index()[[t for t in universe if t in closes.columns]].rename_axis("Ticker", axis=1).stack()
+    tail = long.groupby(level="Ticker").tail(ROLL_WINDOW + 1)
+    counts = tail.groupby(level="Ticker").size()
+    tickers = pd.Index([t for t in universe if counts.get(t, 0) == ROLL_WINDOW + 1], name="Ticker")
+    window = np.vstack([tail.xs(t, level="Ticker").to_numpy(dtype=float) for t in tickers]) if len(tickers) else np.empty((0, ROLL_WINDOW + 1))
+
+    # Per-ticker state (rows = tickers, newest value last)
+    recent_closes = window[:, 1:]
+    recent_rets = np.log(window[:, 1:] / window[:, :-1])
+
+    last_date = pd.to_datetime(closes.index).max()
+    future_dates = [(last_date + pd.Timedelta(days=i + 1)).date() for i in range(steps)]
+    preds = np.empty((steps, len(tickers)))
+
+    for step in range(steps):
+        step_frame = pd.DataFrame(
+            {
+                **{f"ret_lag_{i}": recent_rets[:, -i] for i in range(1, N_LAGS + 1)},
+                "ret_mean_7": recent_rets.mean(axis=1),
+                "ret_std_7": recent_rets.std(axis=1, ddof=1),
+                "close_vs_mean_7": recent_closes[:, -1] / recent_closes.mean(axis=1) - 1,
+                "Ticker": tickers,
+            }
+        )
+        next_ret = model.predict(_encode(step_frame, universe, sector_names, sectors).values)
+        next_close = recent_closes[:, -1] * np.exp(next_ret)
+        preds[step] = next_close
+
+        recent_rets = np.column_stack([recent_rets[:, 1:], next_ret])
+        recent_closes = np.column_stack([recent_closes[:, 1:], next_close])
+
+    return pd.DataFrame(preds, index=pd.Index(future_dates, name="Date"), columns=tickers)
@@ -0,0 +1,187 @@
+import os
+import json
+import datetime
+import tempfile
+import threading
+import pandas as pd
+from alpha_vantage.timeseries import TimeSeries
+
+# -----------------------------------------------------------
+# ✅ Local Per-Ticker History Store
+# -----------------------------------------------------------
+# Alpha Vantage's free tier only serves the last ~100 daily bars
+# ("compact"). Every pull is merged into a CSV per ticker so the
+# history grows over time, and the date spans each pull covered are
+# kept in a small JSON sidecar. Requests that fall inside a known-good
+# span are answered from disk without touching the API.
+
+HISTORY_DIR = os.environ.get("STOCK_HISTORY_DIR", "history_store")
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+# Streamlit sessions are threads in one process; serialise read-merge-write of the store
+_WRITE_LOCK = threading.Lock()
+
+ALPHA_COLUMNS = {
+    "1. open": "Open",
+    "2. high": "High",
+    "3. low": "Low",
+    "4. close": "Close",
+    "5. volume": "Volume",
+}
+
+
+def _paths(ticker):
+    safe = ticker.upper().replace("/", "_")
+    return (
+        os.path.join(HISTORY_DIR, f"{safe}.csv"),
+        os.path.join(HISTORY_DIR, f"{safe}_coverage.json"),
+    )
+
+
+def load_history(ticker):
+    """Return the stored bars for a ticker (empty frame if none)."""
+    csv_path, _ = _paths(ticker)
+    if not os.path.exists(csv_path):
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+    df.index.name = "Date"
+    return df.sort_index()
+
+
+def load_coverage(ticker):
+    """Return the merged list of (start, end) date spans known to be complete."""
+    _, meta_path = _paths(ticker)
+    if not os.path.exists(meta_path):
+        return []
+    with open(meta_path) as fh:
+        raw = json.load(fh)
+    return [(datetime.date.fromisoformat(s), datetime.date.fromisoformat(e)) for s, e in raw]
+
+
+def _merge_spans(spans):
+    merged = []
+    for start, end in sorted(spans):
+        # Spans that touch or are separated only by a weekend join up
+        if merged and start <= merged[-1][1] + datetime.timedelta(days=3):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _atomic_write(path, write):
+    """Write via a temp file in HISTORY_DIR and os.replace it, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=HISTORY_DIR, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", newline="") as fh:
+            write(fh)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_pull(ticker, pull, fetched_on=None):
+    """
+    Merge one API pull into the store, deduplicated by date (newest pull wins),
+    and record the span it covers: first bar of the pull through the day it was fetched.
+    The CSV is replaced before the coverage sidecar, so the sidecar never claims bars the CSV lacks.
+    Returns the full stored history.
+    """
+    if pull.empty:
+        return load_history(ticker)
+
+    fetched_on = fetched_on or datetime.date.today()
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    csv_path, meta_path = _paths(ticker)
+
+    with _WRITE_LOCK:
+        stored = load_history(ticker)
+        history = pd.concat([stored, pull]) if not stored.empty else pull.copy()
+        history = history[~history.index.duplicated(keep="last")].sort_index()
+        history.index.name = "Date"
+        _atomic_write(csv_path, history.to_csv)
+
+        spans = _merge_spans(load_coverage(ticker) + [(pull.index.date.min(), fetched_on)])
+        _atomic_write(meta_path, lambda fh: json.dump([(s.isoformat(), e.isoformat()) for s, e in spans], fh))
+
+    return history
+
+
+def is_covered(spans, start_date, end_date):
+    """True if a single known-good span contains the whole requested range."""
+    return any(s <= start_date and end_date <= e for s, e in spans)
+
+
+def describe_coverage(ticker, start_date, end_date):
+    """
+    Human-readable note on how much of the requested range the store holds,
+    or None when the range is fully covered.
+    """
+    spans = load_coverage(ticker)
+    if is_covered(spans, start_date, end_date):
+        return None
+    if not spans:
+        return f"No stored Alpha Vantage history for {ticker} yet."
+    overlapping = [(max(s, start_date), min(e, end_date)) for s, e in spans if s <= end_date and e >= start_date]
+    if not overlapping:
+        note = f"No stored Alpha Vantage history for {ticker} between {start_date} and {end_date}."
+    else:
+        parts = ", ".join(f"{s} → {e}" for s, e in overlapping)
+        note = f"Stored history for {ticker} covers only {parts} of the requested {start_date} → {end_date}."
+
+    # Compact pulls only return the ~100 most recent rows, so anything before the
+    # first stored bar (or any gap between spans) can never be filled from the free tier.
+    first_stored = spans[0][0]
+    if start_date < first_stored:
+        note += (
+            f" Dates before {first_stored} cannot be filled from the Alpha Vantage free tier "
+            "(compact pulls return only the ~100 most recent daily rows)."
+        )
+    elif len(overlapping) > 1:
+        note += " Gaps between stored spans cannot be filled from the Alpha Vantage free tier."
+    else:
+        note += " Later dates are added by the next Alpha Vantage pull."
+    return note
+
+
+# -----------------------------------------------------------
+# ✅ Alpha Vantage Fetch Backed By The Store
+# -----------------------------------------------------------
+def fetch_alpha_compact(ticker, api_key):
+    """Pull the compact daily series and normalise it to Yahoo-style columns."""
+    ts = TimeSeries(key=api_key, output_format="pandas")
+    data, _ = ts.get_daily(symbol=ticker, outputsize="compact")
+    data = data.rename(columns=ALPHA_COLUMNS)
+    data.index = pd.to_datetime(data.index)
+    data.sort_index(inplace=True)
+    # Alpha Vantage does not provide 'Adj Close' — mirror 'Close' so downstream code doesn't fail
+    if "Adj Close" not in data.columns and "Close" in data.columns:
+        data["Adj Close"] = data["Close"]
+    return data
+
+
+def needs_pull(spans, end_date):
+    """
+    A compact pull only ever adds recent bars, so it is worth an API call
+    only when no stored span already reaches the end of the requested range.
+    """
+    target = min(end_date, datetime.date.today())
+    return not any(e >= target for _, e in spans)
+
+
+def get_alpha_history(ticker, api_key, start_date, end_date):
+    """
+    Serve the requested range from the local store, making one compact pull first
+    only if the store doesn't yet reach end_date. Older gaps can't be filled by a
+    compact pull, so they are reported via describe_coverage() rather than re-fetched.
+    If nothing falls inside the range, the full stored history is returned so the caller can decide.
+    """
+    if needs_pull(load_coverage(ticker), end_date):
+        history = save_pull(ticker, fetch_alpha_compact(ticker, api_key))
+    else:
+        history = load_history(ticker)
+
+    filtered = history.loc[(history.index.date >= start_date) & (history.index.date <= end_date)]
+    return filtered if not filtered.empty else history
@@ -0,0 +1,114 @@
+import os
+import time
+import argparse
+import multiprocessing
+import numpy as np
+
+# -----------------------------------------------------------
+# ✅ Headless Multi-Session Load Driver
+# -----------------------------------------------------------
+# Runs the Streamlit pages headlessly with streamlit.testing's AppTest
+# against an offline market-data source (synthetic by default), so results
+# are deterministic and need no network. Each simulated session runs in its
+# own spawned process: AppTest sets and clears Streamlit's process-wide
+# Runtime on every run, so sessions cannot share a process, and separate
+# processes also mean separate st.cache_data / st.cache_resource stores.
+# Reports page renders/sec and p50/p99 page latency over successful renders.
+#
+#   python -m pages.utils.load_driver --sessions 8 --iterations 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PAGES = {
+    "analysis": os.path.join(ROOT, "pages", "Stock_Analysis.py"),
+    "prediction": os.path.join(ROOT, "pages", "Stock_Prediction.py"),
+}
+DEFAULT_TICKERS = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA"]
+
+
+def run_session(session_id, pages, tickers, iterations, timeout, cold=False):
+    """
+    One simulated user: render each page, then re-render it with a different ticker.
+    Only renders that completed without an exception are timed; the rest (including
+    timeouts) count as failures. With cold=True every Streamlit cache is cleared
+    before each render, so latencies measure full work rather than cache hits.
+    Returns (latencies, failures).
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    latencies, failures = [], 0
+    for page in pages:
+        app = AppTest.from_file(PAGES[page], default_timeout=timeout)
+        for i in range(iterations):
+            ticker = tickers[(session_id + i) % len(tickers)]
+            if cold:
+                st.cache_data.clear()
+                st.cache_resource.clear()
+            started = time.perf_counter()
+            try:
+                if i == 0:
+                    app.run()
+                else:
+                    app.text_input[0].set_value(ticker).run()
+            except Exception:
+                failures += 1
+                continue
+            elapsed = time.perf_counter() - started
+            # A render that raised inside the page is a failure, not a latency sample
+            if len(app.exception):
+                failures += 1
+            else:
+                latencies.append(elapsed)
+    return latencies, failures
+
+
+def run_load(sessions=4, iterations=5, pages=("analysis", "prediction"), tickers=DEFAULT_TICKERS, timeout=120, cold=False):
+    """
+    Drive `sessions` concurrent sessions, one spawned process each, and return a summary dict.
+    pages_per_sec is the sum of each session's successful renders over the time those renders
+    took, so failed or timed-out renders don't dilute the throughput figure.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    args = [(session_id, pages, tickers, iterations, timeout, cold) for session_id in range(sessions)]
+
+    started = time.perf_counter()
+    with ctx.Pool(processes=sessions) as pool:
+        results = pool.starmap(run_session, args)
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for session_lat, _ in results for lat in session_lat]
+    failures = sum(fail for _, fail in results)
+    throughput = sum(len(lat) / sum(lat) for lat, _ in results if lat)
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "sessions": sessions,
+        "pages_rendered": len(latencies),
+        "failures": failures,
+        "attempts": len(latencies) + failures,
+        "elapsed_s": elapsed,
+        "pages_per_sec": throughput,
+        "p50_ms": float(np.percentile(lat_ms, 50)) if len(lat_ms) else float("nan"),
+        "p99_ms": float(np.percentile(lat_ms, 99)) if len(lat_ms) else float("nan"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless multi-session load test for the Streamlit pages")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=5, help="renders per page per session")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--tickers", nargs="+", default=DEFAULT_TICKERS)
+    parser.add_argument("--source", choices=["synthetic", "replay", "server"], default="synthetic")
+    parser.add_argument("--timeout", type=float, default=120, help="per-render timeout in seconds")
+    parser.add_argument("--cold", action="store_true", help="clear Streamlit caches before every render")
+    args = parser.parse_args()
+
+    # Inherited by the spawned session processes
+    os.environ["MARKET_DATA_SOURCE"] = args.source
+    summary = run_load(args.sessions, args.iterations, tuple(args.pages), args.tickers, args.timeout, args.cold)
+    print(
+        f"{summary['sessions']} sessions, {summary['attempts']} renders in {summary['elapsed_s']:.1f}s: "
+        f"{summary['pages_rendered']} ok, {summary['failures']} failed (excluded from the figures below)\n"
+        f"pages/sec: {summary['pages_per_sec']:.2f}   p50: {summary['p50_ms']:.0f} ms   p99: {summary['p99_ms']:.0f} ms"
+    )
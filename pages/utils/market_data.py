@@ -0,0 +1,162 @@
+import os
+import io
+import zlib
+import argparse
+import datetime
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------
+# ✅ Pluggable Market-Data Source
+# -----------------------------------------------------------
+# MARKET_DATA_SOURCE selects where the pages get OHLCV bars from:
+#   live      - yfinance / Alpha Vantage (default)
+#   synthetic - deterministic GBM + jump-process bars, no network
+#   replay    - recorded per-ticker CSVs in MARKET_DATA_REPLAY_DIR
+#   server    - a local mock server (see serve()) at MARKET_DATA_URL
+# The variables are read on every call so a load driver can switch them at runtime.
+
+SOURCES = ("live", "synthetic", "replay", "server")
+SYNTHETIC_EPOCH = datetime.date(2000, 1, 3)
+
+
+def current_source():
+    source = os.environ.get("MARKET_DATA_SOURCE", "live").lower()
+    if source not in SOURCES:
+        raise ValueError(f"Unknown MARKET_DATA_SOURCE '{source}', expected one of {SOURCES}")
+    return source
+
+
+def is_live():
+    return current_source() == "live"
+
+
+# -----------------------------------------------------------
+# ✅ Synthetic OHLCV (GBM + Jumps)
+# -----------------------------------------------------------
+def synthetic_ohlcv(ticker, start_date, end_date, seed=0):
+    """
+    Deterministic daily bars for a ticker. The path always starts at SYNTHETIC_EPOCH and is
+    sliced to the requested range, so overlapping requests see identical prices.
+    Log returns follow GBM with Poisson-arriving normal jumps (Merton); drift, volatility and
+    starting price are derived from the ticker so every symbol looks different.
+    """
+    rng = np.random.default_rng(zlib.crc32(ticker.upper().encode()) ^ seed)
+    mu = rng.uniform(-0.05, 0.25) / 252
+    sigma = rng.uniform(0.15, 0.6) / np.sqrt(252)
+    jump_rate, jump_mu, jump_sigma = 4 / 252, -0.01, 0.05
+    start_price = rng.uniform(10, 500)
+    base_volume = rng.uniform(1e5, 5e7)
+
+    dates = pd.bdate_range(SYNTHETIC_EPOCH, max(end_date, SYNTHETIC_EPOCH), name="Date")
+    n = len(dates)
+    jumps = rng.poisson(jump_rate, n) * rng.normal(jump_mu, jump_sigma, n)
+    log_ret = (mu - 0.5 * sigma**2) + sigma * rng.standard_normal(n) + jumps
+    close = start_price * np.exp(np.cumsum(log_ret))
+
+    # Open gaps from the previous close; High/Low wrap Open/Close by an intraday range
+    prev_close = np.concatenate([[start_price], close[:-1]])
+    open_ = prev_close * np.exp(sigma * 0.3 * rng.standard_normal(n))
+    intraday = np.abs(sigma * rng.standard_normal(n))
+    high = np.maximum(open_, close) * np.exp(intraday * rng.uniform(0.2, 1.0, n))
+    low = np.minimum(open_, close) * np.exp(-intraday * rng.uniform(0.2, 1.0, n))
+    volume = np.round(base_volume * np.exp(0.3 * rng.standard_normal(n) + 5 * np.abs(log_ret)))
+
+    bars = pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Adj Close": close, "Volume": volume},
+        index=dates,
+    )
+    return bars.loc[(bars.index.date >= start_date) & (bars.index.date <= end_date)]
+
+
+# -----------------------------------------------------------
+# ✅ Replay Of Recorded Data
+# -----------------------------------------------------------
+def replay_ohlcv(ticker, start_date, end_date, directory=None):
+    """Bars from a recorded <TICKER>.csv or .csv.gz (Date index, Yahoo-style columns)."""
+    directory = directory or os.environ.get("MARKET_DATA_REPLAY_DIR", os.environ.get("STOCK_HISTORY_DIR", "history_store"))
+    for name in (f"{ticker.upper()}.csv", f"{ticker.upper()}.csv.gz"):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            bars = pd.read_csv(path, index_col=0, parse_dates=True)
+            bars.index.name = "Date"
+            bars = bars.sort_index()
+            return bars.loc[(bars.index.date >= start_date) & (bars.index.date <= end_date)]
+    return pd.DataFrame()
+
+
+def server_ohlcv(ticker, start_date, end_date, url=None):
+    """Bars from a running mock server (see serve())."""
+    url = url or os.environ.get("MARKET_DATA_URL", "http://127.0.0.1:8765")
+    query = urllib.parse.urlencode({"symbol": ticker, "start": start_date.isoformat(), "end": end_date.isoformat()})
+    bars = pd.read_csv(f"{url.rstrip('/')}/ohlcv?{query}", index_col=0, parse_dates=True)
+    bars.index.name = "Date"
+    return bars
+
+
+def download(ticker, start_date, end_date):
+    """Fetch bars from the configured non-live source (inclusive of end_date)."""
+    source = current_source()
+    if source == "synthetic":
+        return synthetic_ohlcv(ticker, start_date, end_date)
+    if source == "replay":
+        return replay_ohlcv(ticker, start_date, end_date)
+    if source == "server":
+        return server_ohlcv(ticker, start_date, end_date)
+    raise ValueError("download() is only for non-live sources; use yfinance when MARKET_DATA_SOURCE=live")
+
+
+# -----------------------------------------------------------
+# ✅ Local Mock Server
+# -----------------------------------------------------------
+def serve(host="127.0.0.1", port=8765, source="synthetic"):
+    """
+    Serve GET /ohlcv?symbol=AAPL&start=YYYY-MM-DD&end=YYYY-MM-DD as CSV, backed by the
+    synthetic generator or the replay directory. Blocks until interrupted.
+    """
+    fetch = synthetic_ohlcv if source == "synthetic" else replay_ohlcv
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urllib.parse.urlparse(self.path)
+            params = urllib.parse.parse_qs(parsed.query)
+            try:
+                if parsed.path != "/ohlcv":
+                    raise LookupError(parsed.path)
+                symbol = params["symbol"][0]
+                start = datetime.date.fromisoformat(params["start"][0])
+                end = datetime.date.fromisoformat(params["end"][0])
+            except (KeyError, ValueError, LookupError) as e:
+                self.send_error(400, f"Bad request: {e}")
+                return
+            buffer = io.StringIO()
+            fetch(symbol, start, end).to_csv(buffer)
+            body = buffer.getvalue().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Mock market-data server ({source}) on http://{host}:{port}/ohlcv")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock market-data server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--source", choices=["synthetic", "replay"], default="synthetic")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.source)
@@ -2,17 +2,28 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import time
+import datetime
 from sklearn.preprocessing import MinMaxScaler
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from pmdarima import auto_arima
 import joblib
 import streamlit as st
 
+try:
+    from pages.utils import market_data
+except ImportError:
+    import market_data
+
 # -----------------------------------------------------------
 # ✅ Fetch Stock Data (Cached)
 # -----------------------------------------------------------
 @st.cache_data(show_spinner=True)
 def get_data(ticker):
+    if not market_data.is_live():
+        today = datetime.date.today()
+        df = market_data.download(ticker, today - datetime.timedelta(days=5 * 365), today)
+        return df.dropna()
+
     retries = 5
     for _ in range(retries):
         try: